@@ -1,11 +1,17 @@
 import asyncio
 import logging
+import os
 
 from aiogram import Bot, Dispatcher
 from aiogram.enums import ParseMode
 
 from .config import get_settings, Settings
+from .currency import FxRateTable
+from .digests import DigestAggregates, DigestScheduler, parse_digest_schedules
 from .google_sheets_client import GoogleSheetsClient
+from .profiling import TracingRequestMiddleware, UpdateProfiler
+from .receipts import ReceiptStore
+from .reconciliation import Reconciler, run_periodically
 
 
 logger = logging.getLogger(__name__)
@@ -19,6 +25,9 @@ async def main() -> None:
     - Configure logging.
     - Initialize the Telegram bot and dispatcher.
     - Initialize the Google Sheets client.
+    - Set up on-demand profiling of updates.
+    - Set up the optional reconciliation job.
+    - Set up the optional scheduled digests.
     - Register all handlers.
     - Start polling for updates.
     """
@@ -39,16 +48,88 @@ async def main() -> None:
     # Initialize Google Sheets client (shared for all handlers)
     sheets_client = GoogleSheetsClient.from_settings(settings)
 
+    # Load the FX rate table once; conversions are served from memory
+    fx_rates: FxRateTable | None = None
+    if settings.fx_rates_path:
+        fx_rates = FxRateTable.from_csv(settings.fx_rates_path, settings.base_currency)
+        logger.info(
+            "Loaded FX rates from %s (base currency %s)",
+            settings.fx_rates_path,
+            fx_rates.base_currency,
+        )
+
+    # Receipts attached to /expense messages are stored locally when configured
+    receipt_store: ReceiptStore | None = None
+    if settings.receipts_dir:
+        receipt_store = ReceiptStore(
+            settings.receipts_dir,
+            max_concurrent_downloads=settings.receipts_max_concurrent_downloads,
+            download_timeout=settings.receipts_download_timeout_seconds,
+        )
+
+    # Digest aggregates are updated on every append; the scheduler only formats them
+    digest_schedules = parse_digest_schedules(settings.digest_schedules)
+    digest_aggregates: DigestAggregates | None = None
+    if digest_schedules:
+        digest_aggregates = DigestAggregates(settings.digest_state_path, fx_rates)
+
+    # Profiling is idle until enabled via PROFILE_UPDATES or /profile
+    profiler = UpdateProfiler(settings.profile_output_dir)
+    dp.update.outer_middleware(profiler)
+    bot.session.middleware(TracingRequestMiddleware())
+    if settings.profile_updates > 0:
+        profiler.start(settings.profile_updates)
+
+    # Reconciliation compares the rows recorded in the append ledger with the sheet
+    reconciler: Reconciler | None = None
+    if sheets_client.ledger is not None:
+        reconciler = Reconciler(
+            spreadsheet=sheets_client.spreadsheet,
+            ledger=sheets_client.ledger,
+            sheet_names=[settings.income_sheet_name, settings.expenses_sheet_name],
+            state_path=os.path.join(settings.reconciliation_dir, "state.json"),
+            block_size=settings.reconciliation_block_size,
+            max_blocks_per_run=settings.reconciliation_max_blocks_per_run,
+        )
+
     # Register handlers (will be implemented step by step)
-    from .handlers import service_commands, income_handler, expense_handler, excel_handler
+    from .handlers import (
+        service_commands,
+        income_handler,
+        expense_handler,
+        excel_handler,
+        profiling_handler,
+        reconciliation_handler,
+    )
 
     service_commands.register_service_commands(dp)
-    income_handler.register_income_handlers(dp, sheets_client)
-    expense_handler.register_expense_handlers(dp, sheets_client)
+    income_handler.register_income_handlers(dp, sheets_client, fx_rates, digest_aggregates)
+    expense_handler.register_expense_handlers(
+        dp, sheets_client, fx_rates, receipt_store, digest_aggregates
+    )
     excel_handler.register_excel_handlers(dp, sheets_client)
+    profiling_handler.register_profiling_handlers(dp, profiler, settings.admin_user_ids)
+    reconciliation_handler.register_reconciliation_handlers(
+        dp, reconciler, settings.admin_user_ids
+    )
+
+    background_tasks = []
+    if reconciler is not None and settings.reconciliation_interval_minutes > 0:
+        background_tasks.append(
+            asyncio.create_task(
+                run_periodically(reconciler, settings.reconciliation_interval_minutes)
+            )
+        )
+    if digest_aggregates is not None:
+        scheduler = DigestScheduler(bot, digest_aggregates, digest_schedules)
+        background_tasks.append(asyncio.create_task(scheduler.run()))
 
     logger.info("Bot is running. Waiting for updates...")
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        for task in background_tasks:
+            task.cancel()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 import os
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 from dotenv import load_dotenv
 
@@ -21,6 +21,36 @@ class Settings:
 
     log_level: str = "INFO"
 
+    # Optional FX rate table (CSV: date,currency,rate) used to add a
+    # normalized base-currency column to appended rows
+    fx_rates_path: str = ""
+    base_currency: str = "USD"
+
+    # Telegram user IDs allowed to run admin commands (e.g. /profile)
+    admin_user_ids: List[int] = field(default_factory=list)
+
+    # Profiling: number of updates to profile right after startup (0 = off)
+    # and the directory for .pstats and Chrome trace files
+    profile_updates: int = 0
+    profile_output_dir: str = "profiles"
+
+    # Reconciliation of bot-appended rows with the spreadsheet.
+    # An empty directory disables both the append ledger and the job.
+    reconciliation_dir: str = ""
+    reconciliation_interval_minutes: int = 60
+    reconciliation_block_size: int = 500
+    reconciliation_max_blocks_per_run: int = 20
+
+    # Receipts attached to /expense messages (empty directory = not stored)
+    receipts_dir: str = ""
+    receipts_max_concurrent_downloads: int = 4
+    receipts_download_timeout_seconds: int = 600
+
+    # Scheduled digests, e.g. "-100123 daily 09:00, -100123 weekly mon 09:00"
+    # (empty = disabled), and the file with running aggregates
+    digest_schedules: str = ""
+    digest_state_path: str = "digests.json"
+
 
 def _get_env(name: str, default: Optional[str] = None, required: bool = False) -> str:
     """
@@ -43,6 +73,16 @@ def _get_env(name: str, default: Optional[str] = None, required: bool = False) -
     return value
 
 
+def _parse_int_list(value: str) -> List[int]:
+    """
+    Parse a comma-separated list of integers, e.g. "123, 456".
+
+    :param value: Raw environment variable value.
+    :return: List of integers (empty if the value is empty).
+    """
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
 def get_settings() -> Settings:
     """
     Create and return a Settings instance using environment variables.
@@ -56,4 +96,26 @@ def get_settings() -> Settings:
         income_sheet_name=_get_env("INCOME_SHEET_NAME", default="Income"),
         expenses_sheet_name=_get_env("EXPENSES_SHEET_NAME", default="Expenses"),
         log_level=_get_env("LOG_LEVEL", default="INFO"),
+        fx_rates_path=_get_env("FX_RATES_PATH", default=""),
+        base_currency=_get_env("BASE_CURRENCY", default="USD"),
+        admin_user_ids=_parse_int_list(_get_env("ADMIN_USER_IDS", default="")),
+        profile_updates=int(_get_env("PROFILE_UPDATES", default="0") or 0),
+        profile_output_dir=_get_env("PROFILE_OUTPUT_DIR", default="profiles"),
+        reconciliation_dir=_get_env("RECONCILIATION_DIR", default=""),
+        reconciliation_interval_minutes=int(
+            _get_env("RECONCILIATION_INTERVAL_MINUTES", default="60") or 60
+        ),
+        reconciliation_block_size=int(_get_env("RECONCILIATION_BLOCK_SIZE", default="500") or 500),
+        reconciliation_max_blocks_per_run=int(
+            _get_env("RECONCILIATION_MAX_BLOCKS_PER_RUN", default="20") or 20
+        ),
+        receipts_dir=_get_env("RECEIPTS_DIR", default=""),
+        receipts_max_concurrent_downloads=int(
+            _get_env("RECEIPTS_MAX_CONCURRENT_DOWNLOADS", default="4") or 4
+        ),
+        receipts_download_timeout_seconds=int(
+            _get_env("RECEIPTS_DOWNLOAD_TIMEOUT_SECONDS", default="600") or 600
+        ),
+        digest_schedules=_get_env("DIGEST_SCHEDULES", default=""),
+        digest_state_path=_get_env("DIGEST_STATE_PATH", default="digests.json"),
     )
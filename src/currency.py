@@ -0,0 +1,287 @@
+import csv
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Whole amount text: optional currency symbol, number, optional currency code or symbol,
+# e.g. "319 USD", "120 000 KZT", "1.500,50 EUR", "$319"
+_AMOUNT_PATTERN = re.compile(
+    r"(?P<prefix>[$€£₸₽])?\s*(?P<number>\d(?:[\d.,\s]*\d)?)"
+    r"\s*(?P<currency>[A-Za-z]{3}|[$€£₸₽])?"
+)
+
+# Separators that may appear inside a number
+_NUMBER_SEPARATORS = re.compile(r"[.,\s]")
+
+# Common currency symbols and their ISO 4217 codes
+CURRENCY_SYMBOLS = {
+    "$": "USD",
+    "€": "EUR",
+    "£": "GBP",
+    "₸": "KZT",
+    "₽": "RUB",
+}
+
+# Precision used for the normalized base-currency column
+_NORMALIZED_QUANT = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class ParsedAmount:
+    """Amount parsed from free text: a decimal value and an ISO currency code."""
+
+    value: Decimal
+    currency: str
+
+
+def parse_amount(value: str, default_currency: str = "") -> Optional[ParsedAmount]:
+    """
+    Parse a free-text amount such as "319 USD", "120 000 KZT" or "276€".
+
+    The whole text must be an amount: anything after the number other than
+    a currency code or symbol (e.g. "500 USDT", "500 USD cash") is rejected
+    rather than silently ignored.
+
+    :param value: Amount text as written by the user.
+    :param default_currency: Currency code to use when the text has none
+        (e.g. the USD line of the /expense template).
+    :return: ParsedAmount, or None if the text is not a valid amount
+        or no currency can be determined.
+    """
+    match = _AMOUNT_PATTERN.fullmatch(value.strip())
+    if match is None:
+        return None
+
+    prefix, suffix = match.group("prefix"), match.group("currency")
+    if prefix and suffix:
+        return None
+
+    amount = _parse_number(match.group("number"))
+    if amount is None:
+        return None
+
+    currency = prefix or suffix or ""
+    currency = CURRENCY_SYMBOLS.get(currency, currency.upper()) or default_currency.upper()
+    if not currency:
+        return None
+
+    return ParsedAmount(value=amount, currency=currency)
+
+
+def _parse_number(text: str) -> Optional[Decimal]:
+    """
+    Parse a number with optional thousands and decimal separators.
+
+    Accepted forms: "1000", "1000.50", "12,5", "1 000", "1,000", "1.000",
+    "120,000.50", "1.500,50", "1 000,50".
+
+    A single "." or "," followed by exactly three digits is a thousands
+    separator ("1,000" and "1.000" are both 1000), since money amounts do
+    not have three decimal places; "0.125" is still a decimal.
+    When "." and "," are both used, the last one is the decimal separator.
+    """
+    separators = [sep if not sep.isspace() else " " for sep in _NUMBER_SEPARATORS.findall(text)]
+    parts = _NUMBER_SEPARATORS.split(text)
+    if not all(part.isdigit() for part in parts):
+        return None
+
+    fraction = ""
+    if separators and separators[-1] != " ":
+        last = separators[-1]
+        if separators.count(last) == 1 and (
+            len(separators) > 1 or len(parts[-1]) != 3 or parts[0] == "0"
+        ):
+            fraction = parts.pop()
+            separators.pop()
+
+    # Whatever is left must be thousands groups of a single kind: 1–3 digits, then groups of 3
+    if separators:
+        if len(set(separators)) > 1:
+            return None
+        if not 1 <= len(parts[0]) <= 3 or any(len(part) != 3 for part in parts[1:]):
+            return None
+
+    integer = "".join(parts)
+    return Decimal(f"{integer}.{fraction}" if fraction else integer)
+
+
+def parse_record_date(value: str) -> Optional[date]:
+    """
+    Parse a record date in DD.MM.YY or DD.MM.YYYY format.
+
+    :return: date object, or None if the value is not a valid date.
+    """
+    value = value.strip()
+    for fmt in ("%d.%m.%Y", "%d.%m.%y"):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+@dataclass
+class FxRateTable:
+    """
+    In-memory FX rate table indexed by currency and date.
+
+    Each rate is the amount of base currency for one unit of the given currency.
+    Lookups use the latest rate published on or before the requested date,
+    and resolved (currency, date) pairs are cached.
+    """
+
+    base_currency: str
+    # currency -> sorted list of date ordinals and matching rates
+    _dates: Dict[str, List[int]] = field(default_factory=dict)
+    _rates: Dict[str, List[Decimal]] = field(default_factory=dict)
+    _cache: Dict[Tuple[str, int], Optional[Decimal]] = field(default_factory=dict)
+
+    @classmethod
+    def from_csv(cls, path: str, base_currency: str) -> "FxRateTable":
+        """
+        Load a rate table from a CSV file with the header ``date,currency,rate``.
+
+        Dates are in ISO format (YYYY-MM-DD).
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = [
+                (
+                    date.fromisoformat(row["date"].strip()),
+                    row["currency"].strip().upper(),
+                    Decimal(row["rate"].strip()),
+                )
+                for row in csv.DictReader(f)
+            ]
+        return cls.from_rows(rows, base_currency)
+
+    @classmethod
+    def from_rows(
+        cls, rows: Iterable[Tuple[date, str, Decimal]], base_currency: str
+    ) -> "FxRateTable":
+        """Build a rate table from (date, currency, rate) tuples."""
+        by_currency: Dict[str, Dict[int, Decimal]] = {}
+        for day, currency, rate in rows:
+            by_currency.setdefault(currency, {})[day.toordinal()] = rate
+
+        table = cls(base_currency=base_currency.upper())
+        for currency, series in by_currency.items():
+            ordinals = sorted(series)
+            table._dates[currency] = ordinals
+            table._rates[currency] = [series[o] for o in ordinals]
+        return table
+
+    def rate(self, currency: str, on: date) -> Optional[Decimal]:
+        """
+        Return the rate for the currency on the given date.
+
+        :return: Base-currency units per one unit of currency, or None if unknown.
+        """
+        if currency == self.base_currency:
+            return Decimal(1)
+
+        key = (currency, on.toordinal())
+        if key in self._cache:
+            return self._cache[key]
+
+        rate: Optional[Decimal] = None
+        ordinals = self._dates.get(currency)
+        if ordinals:
+            index = bisect_right(ordinals, key[1])
+            if index:
+                rate = self._rates[currency][index - 1]
+
+        self._cache[key] = rate
+        return rate
+
+    def convert(self, amount: ParsedAmount, on: date) -> Optional[Decimal]:
+        """Convert a single amount into the base currency."""
+        rate = self.rate(amount.currency, on)
+        if rate is None:
+            return None
+        return amount.value * rate
+
+    def convert_many(
+        self,
+        amounts: Sequence[Optional[ParsedAmount]],
+        dates: Sequence[Optional[date]],
+    ) -> List[Optional[Decimal]]:
+        """
+        Convert many amounts at once (e.g. when backfilling historical rows).
+
+        Rates are resolved once per distinct (currency, date) pair rather
+        than once per row, so large backfills stay fast.
+        """
+        groups: Dict[Tuple[str, date], List[int]] = {}
+        for index, (amount, day) in enumerate(zip(amounts, dates)):
+            if amount is not None and day is not None:
+                groups.setdefault((amount.currency, day), []).append(index)
+
+        result: List[Optional[Decimal]] = [None] * len(amounts)
+        for (currency, day), indices in groups.items():
+            rate = self.rate(currency, day)
+            if rate is None:
+                continue
+            for index in indices:
+                result[index] = amounts[index].value * rate  # type: ignore[union-attr]
+        return result
+
+    def normalize(self, date_value: str, amounts: Sequence[Tuple[str, str]]) -> str:
+        """
+        Return the total of the record's amounts in the base currency as cell text.
+
+        :param date_value: Record date (DD.MM.YY or DD.MM.YYYY).
+        :param amounts: (amount text, default currency) pairs; empty texts are skipped.
+        :return: Total formatted with two decimals, or an empty string if
+            any non-empty amount cannot be converted.
+        """
+        totals = self.normalize_many([date_value], [amounts])
+        return totals[0]
+
+    def normalize_many(
+        self,
+        date_values: Sequence[str],
+        amounts: Sequence[Sequence[Tuple[str, str]]],
+    ) -> List[str]:
+        """
+        Bulk version of ``normalize`` for backfilling the base-currency column.
+
+        :param date_values: Record date for each row.
+        :param amounts: Amount (text, default currency) pairs for each row.
+        :return: Normalized cell text for each row.
+        """
+        # Many rows share a date, so each distinct date string is parsed once
+        parsed_dates = {value: parse_record_date(value) for value in set(date_values)}
+        dates = [parsed_dates[value] for value in date_values]
+
+        # Flatten all amount cells so rates are resolved in a single bulk pass
+        owners: List[int] = []
+        parsed: List[Optional[ParsedAmount]] = []
+        flat_dates: List[Optional[date]] = []
+        failed = [day is None for day in dates]
+        for row, row_amounts in enumerate(amounts):
+            for text, default_currency in row_amounts:
+                if not text:
+                    continue
+                amount = parse_amount(text, default_currency)
+                if amount is None:
+                    failed[row] = True
+                    continue
+                owners.append(row)
+                parsed.append(amount)
+                flat_dates.append(dates[row])
+
+        totals: List[Decimal] = [Decimal(0)] * len(dates)
+        for row, converted in zip(owners, self.convert_many(parsed, flat_dates)):
+            if converted is None:
+                failed[row] = True
+            else:
+                totals[row] += converted
+
+        return [
+            "" if failed[row] else str(totals[row].quantize(_NORMALIZED_QUANT))
+            for row in range(len(dates))
+        ]
@@ -0,0 +1,324 @@
+import asyncio
+import html
+import json
+import logging
+import os
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .currency import FxRateTable, parse_amount, parse_record_date
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+# Daily buckets older than this are dropped; weekly digests need only 7 days.
+# Missed digests are caught up only while all days they cover are still kept.
+_KEEP_DAYS = 14
+
+# Number of expense names listed in a digest
+_TOP_EXPENSES = 5
+
+
+@dataclass(frozen=True)
+class DigestSchedule:
+    """
+    When and where to post a digest.
+
+    A daily digest posted at ``at`` covers the previous day;
+    a weekly digest covers the previous 7 days.
+    """
+
+    chat_id: int
+    period: str  # "daily" or "weekly"
+    at: time
+    weekday: int = 0  # weekly digests only, 0 = Monday
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used to remember the last run."""
+        return f"{self.chat_id}:{self.period}:{self.weekday}:{self.at.strftime('%H:%M')}"
+
+    @property
+    def days(self) -> int:
+        return 7 if self.period == "weekly" else 1
+
+    def latest_due(self, now: datetime) -> datetime:
+        """Return the most recent scheduled time that is not in the future."""
+        days_back = (now.weekday() - self.weekday) % 7 if self.period == "weekly" else 0
+        due = datetime.combine(now.date() - timedelta(days=days_back), self.at)
+        if due > now:
+            due -= timedelta(days=self.days)
+        return due
+
+    def missed_due(self, last_run: datetime, now: datetime) -> List[datetime]:
+        """
+        Return the scheduled times after ``last_run`` that are not in the future,
+        oldest first. Times whose period starts more than ``_KEEP_DAYS`` days
+        ago are skipped, since some of their records are no longer kept.
+        """
+        oldest = now.date() - timedelta(days=_KEEP_DAYS - self.days)
+        due = self.latest_due(now)
+        missed: List[datetime] = []
+        while due > last_run and due.date() >= oldest:
+            missed.append(due)
+            due -= timedelta(days=self.days)
+        return missed[::-1]
+
+
+def parse_digest_schedules(value: str) -> List[DigestSchedule]:
+    """
+    Parse digest schedules from a comma-separated list of entries:
+
+    ``<chat_id> daily HH:MM`` or ``<chat_id> weekly <mon..sun> HH:MM``
+
+    :raises RuntimeError: if an entry cannot be parsed.
+    """
+    schedules: List[DigestSchedule] = []
+    for entry in value.split(","):
+        parts = entry.split()
+        if not parts:
+            continue
+        try:
+            if len(parts) == 3 and parts[1] == "daily":
+                schedules.append(DigestSchedule(
+                    chat_id=int(parts[0]),
+                    period="daily",
+                    at=datetime.strptime(parts[2], "%H:%M").time(),
+                ))
+            elif len(parts) == 4 and parts[1] == "weekly":
+                schedules.append(DigestSchedule(
+                    chat_id=int(parts[0]),
+                    period="weekly",
+                    at=datetime.strptime(parts[3], "%H:%M").time(),
+                    weekday=WEEKDAYS.index(parts[2].lower()),
+                ))
+            else:
+                raise ValueError(entry)
+        except ValueError:
+            raise RuntimeError(
+                f"Invalid digest schedule '{entry.strip()}'. Expected "
+                "'<chat_id> daily HH:MM' or '<chat_id> weekly <mon..sun> HH:MM'."
+            ) from None
+    return schedules
+
+
+class DigestAggregates:
+    """
+    Running per-chat aggregates of appended records, persisted to a JSON file.
+
+    Aggregates are kept in daily buckets by record date and updated after
+    each successful append, so a digest never needs to re-read the
+    spreadsheet. The file also stores the last run of every schedule.
+
+    When an FX rate table is given, expense names are ranked by their total
+    in the base currency; otherwise by the number of records.
+    """
+
+    def __init__(self, path: str, fx_rates: Optional[FxRateTable] = None) -> None:
+        self.path = Path(path)
+        self.fx_rates = fx_rates
+        # chat id (string, JSON keys) -> ISO date -> bucket
+        self._chats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # schedule key -> ISO datetime of the last served run
+        self.last_runs: Dict[str, str] = {}
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+            self._chats = state.get("chats", {})
+            self.last_runs = state.get("last_runs", {})
+
+    def record_income(self, chat_id: int, values: List[str]) -> None:
+        """Add an appended /income row (see parse_income_message) to the aggregates."""
+        self._record(chat_id, values[0], "income", values[9], [(values[1], "")])
+        self.save()
+
+    def record_expense(self, chat_id: int, values: List[str]) -> None:
+        """Add an appended /expense row (see parse_expense_message) to the aggregates."""
+        amounts = [(values[1], "USD"), (values[2], "EUR"), (values[3], "")]
+        bucket = self._record(chat_id, values[0], "expense", values[5], amounts)
+
+        name = values[4]
+        names = bucket.setdefault("expense_names", {})
+        names[name] = names.get(name, 0) + 1
+
+        if self.fx_rates is not None:
+            base_total = self.fx_rates.normalize(values[0], amounts)
+            if base_total:
+                totals = bucket.setdefault("expense_base_totals", {})
+                totals[name] = str(Decimal(totals.get(name, "0")) + Decimal(base_total))
+        self.save()
+
+    def format_digest(self, chat_id: int, end: date, days: int) -> str:
+        """
+        Build the digest text for the ``days`` days before ``end`` (exclusive).
+
+        :return: Digest text in Telegram HTML.
+        """
+        start = end - timedelta(days=days)
+        buckets = [
+            bucket
+            for day, bucket in self._chats.get(str(chat_id), {}).items()
+            if start <= date.fromisoformat(day) < end
+        ]
+
+        first_day = start.strftime("%d.%m.%Y")
+        last_day = (end - timedelta(days=1)).strftime("%d.%m.%Y")
+        if days == 1:
+            title = f"<b>Daily digest</b> {last_day}"
+        else:
+            title = f"<b>Weekly digest</b> {first_day}–{last_day}"
+
+        lines = [title]
+        for kind, label in (("income", "Income"), ("expense", "Expenses")):
+            count = sum(bucket.get("count", {}).get(kind, 0) for bucket in buckets)
+            lines.append(f"<b>{label}</b> – {count} records")
+
+            # currency -> manager -> total
+            totals: Dict[str, Dict[str, Decimal]] = {}
+            for bucket in buckets:
+                for currency, managers in bucket.get("totals", {}).get(kind, {}).items():
+                    for manager, amount in managers.items():
+                        by_manager = totals.setdefault(currency, {})
+                        by_manager[manager] = by_manager.get(manager, Decimal(0)) + Decimal(amount)
+
+            for currency in sorted(totals):
+                by_manager = totals[currency]
+                breakdown = ", ".join(
+                    f"{html.escape(manager)} {by_manager[manager]:.2f}"
+                    for manager in sorted(by_manager, key=by_manager.get, reverse=True)
+                )
+                lines.append(f"• {currency} {sum(by_manager.values()):.2f}: {breakdown}")
+
+        if self.fx_rates is not None:
+            base_totals: Counter = Counter()
+            for bucket in buckets:
+                for name, amount in bucket.get("expense_base_totals", {}).items():
+                    base_totals[name] += Decimal(amount)
+            if base_totals:
+                top = ", ".join(
+                    f"{html.escape(name)} {amount:.2f}"
+                    for name, amount in base_totals.most_common(_TOP_EXPENSES)
+                )
+                lines.append(f"Top expenses ({self.fx_rates.base_currency}): {top}")
+        else:
+            names: Counter = Counter()
+            for bucket in buckets:
+                names.update(bucket.get("expense_names", {}))
+            if names:
+                top = ", ".join(
+                    f"{html.escape(name)} ({count})"
+                    for name, count in names.most_common(_TOP_EXPENSES)
+                )
+                lines.append(f"Most frequent expenses: {top}")
+
+        return "\n".join(lines)
+
+    def save(self) -> None:
+        """Write the aggregates to disk, dropping buckets that are no longer needed."""
+        oldest = (date.today() - timedelta(days=_KEEP_DAYS)).isoformat()
+        for days in self._chats.values():
+            for day in [day for day in days if day < oldest]:
+                del days[day]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"chats": self._chats, "last_runs": self.last_runs}, f)
+        os.replace(tmp_path, self.path)
+
+    # --- Internal helpers ---
+
+    def _record(
+        self,
+        chat_id: int,
+        date_value: str,
+        kind: str,
+        manager: str,
+        amounts: List[Tuple[str, str]],
+    ) -> Dict[str, Any]:
+        """Update the chat's bucket for the record date (today if unparsable) and return it."""
+        day = parse_record_date(date_value) or date.today()
+        bucket = self._chats.setdefault(str(chat_id), {}).setdefault(day.isoformat(), {})
+
+        counts = bucket.setdefault("count", {})
+        counts[kind] = counts.get(kind, 0) + 1
+
+        totals = bucket.setdefault("totals", {}).setdefault(kind, {})
+        for text, default_currency in amounts:
+            amount = parse_amount(text, default_currency) if text else None
+            if amount is None:
+                continue
+            by_manager = totals.setdefault(amount.currency, {})
+            by_manager[manager] = str(Decimal(by_manager.get(manager, "0")) + amount.value)
+
+        return bucket
+
+
+class DigestScheduler:
+    """
+    Asyncio scheduler that posts digests to chats.
+
+    On every tick it checks each schedule's due times against the last run
+    stored in the aggregates file, so every run missed while the bot was
+    down (up to ``_KEEP_DAYS`` back) is posted right after the restart.
+    """
+
+    def __init__(
+        self, bot: "Bot", aggregates: DigestAggregates, schedules: List[DigestSchedule]
+    ) -> None:
+        self.bot = bot
+        self.aggregates = aggregates
+        self.schedules = schedules
+
+    async def run(self) -> None:
+        """Run the scheduler until cancelled."""
+        while True:
+            now = datetime.now()
+            next_due: Optional[datetime] = None
+
+            for schedule in self.schedules:
+                due = schedule.latest_due(now)
+                last_run = self.aggregates.last_runs.get(schedule.key)
+
+                # First start: do not post digests for periods before the bot was set up
+                if last_run is None:
+                    self.aggregates.last_runs[schedule.key] = due.isoformat()
+                    self.aggregates.save()
+                else:
+                    for missed in schedule.missed_due(datetime.fromisoformat(last_run), now):
+                        await self._post(schedule, missed)
+                        self.aggregates.last_runs[schedule.key] = missed.isoformat()
+                        self.aggregates.save()
+
+                upcoming = due + timedelta(days=schedule.days)
+                if next_due is None or upcoming < next_due:
+                    next_due = upcoming
+
+            # Wake up at least once a minute to follow system clock changes
+            delay = 60.0
+            if next_due is not None:
+                delay = min(delay, max(1.0, (next_due - datetime.now()).total_seconds()))
+            await asyncio.sleep(delay)
+
+    # --- Internal helpers ---
+
+    async def _post(self, schedule: DigestSchedule, due: datetime) -> None:
+        text = self.aggregates.format_digest(schedule.chat_id, due.date(), schedule.days)
+        try:
+            await self.bot.send_message(schedule.chat_id, text)
+        except Exception:
+            # A failed digest is not retried, to avoid flooding the log every minute
+            logger.exception(
+                "Failed to post %s digest to chat %s", schedule.period, schedule.chat_id
+            )
+            return
+        logger.info("Posted %s digest to chat %s", schedule.period, schedule.chat_id)
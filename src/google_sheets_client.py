@@ -1,10 +1,20 @@
-from dataclasses import dataclass
-from typing import List
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
 
 import gspread
 from google.oauth2.service_account import Credentials
 
 from .config import Settings, get_settings
+from .profiling import span
+from .reconciliation import AppendLedger
+
+logger = logging.getLogger(__name__)
+
+# Row number of the first cell in an A1 range such as "'Income'!A5:K5"
+_UPDATED_RANGE_ROW = re.compile(r"!\$?[A-Za-z]+\$?(\d+)")
 
 
 # Scopes required to access Google Sheets and (optionally) Drive
@@ -14,6 +24,19 @@ SCOPES = [
 ]
 
 
+@dataclass
+class AppendedRow:
+    """A row appended by the bot, as needed to update it later."""
+
+    sheet_name: str
+    # Sheet row the row landed on (hand edits may move it later)
+    row: int
+    # Values as rendered by Google Sheets
+    values: List[str] = field(default_factory=list)
+    # Row number in the append ledger, if reconciliation is enabled
+    ledger_row: Optional[int] = None
+
+
 @dataclass
 class GoogleSheetsClient:
     """
@@ -23,11 +46,14 @@ class GoogleSheetsClient:
     - Authenticate using a service account JSON file.
     - Open the target spreadsheet by its ID.
     - Append rows to the Income and Expenses worksheets.
+    - Update single cells of rows written by the bot.
+    - Optionally record written rows in a ledger used for reconciliation.
     """
 
     settings: Settings
     client: gspread.Client
     spreadsheet: gspread.Spreadsheet
+    ledger: Optional[AppendLedger] = None
 
     @classmethod
     def from_settings(cls, settings: Settings) -> "GoogleSheetsClient":
@@ -42,10 +68,15 @@ class GoogleSheetsClient:
         gc = gspread.authorize(credentials)
         spreadsheet = gc.open_by_key(settings.spreadsheet_id)
 
+        ledger = None
+        if settings.reconciliation_dir:
+            ledger = AppendLedger(os.path.join(settings.reconciliation_dir, "ledger.jsonl"))
+
         return cls(
             settings=settings,
             client=gc,
             spreadsheet=spreadsheet,
+            ledger=ledger,
         )
 
     @classmethod
@@ -59,21 +90,43 @@ class GoogleSheetsClient:
 
     # --- Public methods for appending rows ---
 
-    def append_income_row(self, values: List[str]) -> None:
+    def append_income_row(
+        self, values: List[str], after_append: Sequence[Callable[[], None]] = ()
+    ) -> Optional[AppendedRow]:
         """
         Append a new row to the Income worksheet.
 
         :param values: List of cell values as strings, in the expected column order.
+        :param after_append: Best-effort callbacks run once the row is written.
+        :return: The appended row, if its position was reported by the API.
         """
-        self._append_row(self.settings.income_sheet_name, values)
+        return self._append_row(self.settings.income_sheet_name, values, after_append)
 
-    def append_expense_row(self, values: List[str]) -> None:
+    def append_expense_row(
+        self, values: List[str], after_append: Sequence[Callable[[], None]] = ()
+    ) -> Optional[AppendedRow]:
         """
         Append a new row to the Expenses worksheet.
 
         :param values: List of cell values as strings, in the expected column order.
+        :param after_append: Best-effort callbacks run once the row is written.
+        :return: The appended row, if its position was reported by the API.
+        """
+        return self._append_row(self.settings.expenses_sheet_name, values, after_append)
+
+    def update_expense_cell(
+        self, appended: AppendedRow, column: int, value: str, expected: str
+    ) -> bool:
+        """
+        Update one cell of a row previously appended to the Expenses worksheet.
+
+        :param appended: Row returned by ``append_expense_row``.
+        :param column: Column number (1-based).
+        :param value: New cell value.
+        :param expected: Value the cell must still hold; otherwise the row has moved.
+        :return: True if the cell was updated.
         """
-        self._append_row(self.settings.expenses_sheet_name, values)
+        return self._update_cell(appended, column, value, expected)
 
     # --- Optional helpers ---
 
@@ -88,13 +141,114 @@ class GoogleSheetsClient:
 
     # --- Internal helpers ---
 
-    def _append_row(self, sheet_name: str, values: List[str]) -> None:
+    def _append_row(
+        self,
+        sheet_name: str,
+        values: List[str],
+        after_append: Sequence[Callable[[], None]] = (),
+    ) -> Optional[AppendedRow]:
         """
         Append a row of values to the given worksheet.
 
+        Once the row is written, it is recorded in the ledger (if any) and
+        ``after_append`` callbacks are run. Their failures are logged and
+        never reported as a failed append.
+
         :param sheet_name: Name of the worksheet (tab) in the spreadsheet.
         :param values: List of cell values as strings.
+        :param after_append: Callbacks run after a successful append.
+        :return: The appended row, if its position was reported by the API.
+        """
+        before = self._revision() if self.ledger is not None else None
+        with span("GoogleSheetsClient._append_row"):
+            worksheet = self.spreadsheet.worksheet(sheet_name)
+            # USER_ENTERED makes Google Sheets interpret numbers and dates naturally
+            response = worksheet.append_row(
+                values,
+                value_input_option="USER_ENTERED",
+                include_values_in_response=self.ledger is not None,
+            )
+
+        updates = response.get("updates", {})
+        appended: Optional[AppendedRow] = None
+        match = _UPDATED_RANGE_ROW.search(updates.get("updatedRange", ""))
+        if match is None:
+            logger.warning("Unable to determine appended row from response: %s", updates)
+        else:
+            # Prefer the values as rendered by Google Sheets, since that is what is read back
+            rendered = updates.get("updatedData", {}).get("values") or [values]
+            appended = AppendedRow(sheet_name, int(match.group(1)), list(rendered[0]))
+
+        hooks = list(after_append)
+        if self.ledger is not None and appended is not None:
+
+            def record_in_ledger() -> None:
+                appended.ledger_row = self.ledger.record_append(
+                    sheet_name, appended.row, appended.values, (before, self._revision())
+                )
+
+            hooks.insert(0, record_in_ledger)
+
+        # The row is already written, so a failing hook must not fail the append
+        for hook in hooks:
+            try:
+                hook()
+            except Exception:
+                logger.exception(
+                    "Post-append hook failed for %s row %s",
+                    sheet_name,
+                    appended.row if appended else None,
+                )
+
+        return appended
+
+    def _update_cell(
+        self, appended: AppendedRow, column: int, value: str, expected: str
+    ) -> bool:
+        """
+        Update one cell of a row appended by the bot.
+
+        The row is addressed by the sheet row it was appended to. If rows were
+        inserted or deleted by hand since then, the cell no longer holds
+        ``expected`` and nothing is written.
+
+        :param appended: Row returned by ``_append_row``.
+        :param column: Column number (1-based).
+        :param value: New cell value.
+        :param expected: Value the cell must still hold.
+        :return: True if the cell was updated.
         """
-        worksheet = self.spreadsheet.worksheet(sheet_name)
-        # USER_ENTERED makes Google Sheets interpret numbers and dates naturally
-        worksheet.append_row(values, value_input_option="USER_ENTERED")
+        with span("GoogleSheetsClient._update_cell"):
+            worksheet = self.spreadsheet.worksheet(appended.sheet_name)
+            current = worksheet.cell(appended.row, column).value or ""
+            if current != expected:
+                logger.warning(
+                    "Not updating %s row %s: column %s holds %r instead of %r",
+                    appended.sheet_name, appended.row, column, current, expected,
+                )
+                return False
+
+            before = self._revision() if self.ledger is not None else None
+            worksheet.update_cell(appended.row, column, value)
+
+        # Hash the row as the bot wrote it, not a fresh read that could include hand edits
+        values = appended.values + [""] * (column - len(appended.values))
+        values[column - 1] = value
+        appended.values = values
+
+        if self.ledger is not None and appended.ledger_row is not None:
+            # Keep the ledger in sync so reconciliation does not report the bot's own edit
+            self.ledger.record_update(
+                appended.sheet_name, appended.ledger_row, values, (before, self._revision())
+            )
+        return True
+
+    def _revision(self) -> Optional[str]:
+        """Return the spreadsheet revision (Drive modified time), or None if unavailable."""
+        try:
+            return self.spreadsheet.get_lastUpdateTime()
+        except Exception:
+            # Without a revision the write is not recognized as the bot's own,
+            # so reconciliation just re-reads the affected blocks
+            logger.exception("Failed to read the spreadsheet revision")
+            return None
@@ -6,13 +6,24 @@ This package contains:
 - income_handler: /income
 - expense_handler: /expense
 - excel_handler: /excel
+- profiling_handler: /profile (administrators only)
+- reconciliation_handler: /reconcile (administrators only)
 """
 
-from . import service_commands, income_handler, expense_handler, excel_handler
+from . import (
+    service_commands,
+    income_handler,
+    expense_handler,
+    excel_handler,
+    profiling_handler,
+    reconciliation_handler,
+)
 
 __all__ = [
     "service_commands",
     "income_handler",
     "expense_handler",
     "excel_handler",
+    "profiling_handler",
+    "reconciliation_handler",
 ]
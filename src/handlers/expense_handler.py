@@ -1,16 +1,32 @@
+import asyncio
 import logging
 import re
-from typing import List
+from functools import partial
+from typing import List, Set
 
 from aiogram import Dispatcher, Router, types
 from aiogram.filters import Command
 
-from ..google_sheets_client import GoogleSheetsClient
+from ..currency import FxRateTable, parse_amount
+from ..digests import DigestAggregates
+from ..google_sheets_client import AppendedRow, GoogleSheetsClient
+from ..profiling import span
+from ..receipts import ReceiptStore
 
 logger = logging.getLogger(__name__)
 router = Router()
 
 _sheets_client: GoogleSheetsClient | None = None
+_fx_rates: FxRateTable | None = None
+_digest_aggregates: DigestAggregates | None = None
+_receipt_store: ReceiptStore | None = None
+
+# Receipt downloads running in the background (references keep the tasks alive)
+_receipt_tasks: Set[asyncio.Task] = set()
+
+# Optional columns have fixed positions (see "Column layout" in README.md):
+# H – total in the base currency, I – receipt reference
+RECEIPT_COLUMN = 9
 
 
 class ExpenseValidationError(Exception):
@@ -25,6 +41,10 @@ async def handle_expense(message: types.Message) -> None:
 
     The message is expected to contain 6 or 7 lines after the command.
     If validation succeeds, a new row is appended to the Expenses worksheet.
+
+    The template can also be sent as the caption of a photo or document;
+    the attachment is then saved as a receipt in the background and
+    referenced in the row once downloaded.
     """
     if _sheets_client is None:
         logger.error("GoogleSheetsClient is not initialized in expense_handler.")
@@ -33,9 +53,10 @@ async def handle_expense(message: types.Message) -> None:
         )
         return
 
-    text = message.text or ""
+    text = message.text or message.caption or ""
     try:
-        values = parse_expense_message(text)
+        with span("parse_expense_message"):
+            values = parse_expense_message(text)
     except ExpenseValidationError as e:
         # Validation error – send a clear message to the user
         await message.answer(str(e))
@@ -49,8 +70,43 @@ async def handle_expense(message: types.Message) -> None:
         )
         return
 
+    # Amounts feed the base-currency column and digest totals; reject the ones
+    # they cannot read instead of silently leaving them out
+    amounts = [(values[1], "USD"), (values[2], "EUR"), (values[3], "")]
+    if _fx_rates is not None or _digest_aggregates is not None:
+        for line_number, (amount, default_currency) in enumerate(amounts, start=2):
+            if amount and parse_amount(amount, default_currency) is None:
+                await message.answer(
+                    f"Error in line {line_number}: unable to parse amount. "
+                    "Use a number followed by a currency code, e.g. 319 USD, 276 EUR, 120000 KZT."
+                )
+                return
+
+    # Optional extra column: total of lines 2–4 normalized to the base currency.
+    # It is left empty when FX is disabled but a later optional column is used.
+    not_converted = False
+    if _fx_rates is not None:
+        base_total = _fx_rates.normalize(values[0], amounts)
+        if not base_total:
+            logger.warning("No FX rate to convert /expense amounts %s on %s", amounts, values[0])
+            not_converted = True
+        values.append(base_total)
+    elif _receipt_store is not None:
+        values.append("")
+
+    # Optional extra column: reference to the receipt in the local store.
+    # The row is written first with a placeholder, the download runs afterwards.
+    attachment = None
+    if _receipt_store is not None:
+        attachment = message.photo[-1] if message.photo else message.document
+        values.append(f"pending:{attachment.file_unique_id}" if attachment is not None else "")
+
+    after_append = []
+    if _digest_aggregates is not None:
+        after_append.append(partial(_digest_aggregates.record_expense, message.chat.id, values))
+
     try:
-        _sheets_client.append_expense_row(values)
+        appended = _sheets_client.append_expense_row(values, after_append)
     except Exception:
         logger.exception("Failed to append expense row to Google Sheets")
         await message.answer(
@@ -59,10 +115,63 @@ async def handle_expense(message: types.Message) -> None:
         )
         return
 
+    if attachment is not None:
+        task = asyncio.create_task(_save_receipt(message, attachment, appended))
+        _receipt_tasks.add(task)
+        task.add_done_callback(_receipt_tasks.discard)
+
     # Success
+    if not_converted:
+        await message.answer(
+            f"Done, but the amount could not be converted to {_fx_rates.base_currency}: "
+            "no exchange rate for this date."
+        )
+        return
     await message.answer("Done")
 
 
+async def _save_receipt(
+    message: types.Message,
+    attachment: types.PhotoSize | types.Document,
+    appended: AppendedRow | None,
+) -> None:
+    """
+    Download the receipt of an appended /expense row and put its reference
+    into the receipt column (``failed:<file_unique_id>`` if the download fails).
+    """
+    try:
+        reference = await _receipt_store.save_from_telegram(
+            message.bot, attachment.file_id, attachment.file_unique_id
+        )
+    except Exception:
+        # The record itself is already written; only the receipt is missing
+        logger.exception("Failed to save receipt for /expense message")
+        reference = f"failed:{attachment.file_unique_id}"
+        try:
+            await message.answer(
+                "The record is saved, but the receipt could not be saved. "
+                "Please send it to the administrator separately."
+            )
+        except Exception:
+            logger.exception("Failed to report receipt failure")
+
+    if appended is None:
+        logger.warning("Receipt %s saved, but the expense row is unknown", reference)
+        return
+
+    try:
+        # Skipped if hand edits moved another record onto this row in the meantime
+        updated = _sheets_client.update_expense_cell(
+            appended, RECEIPT_COLUMN, reference, f"pending:{attachment.file_unique_id}"
+        )
+        if not updated:
+            logger.warning(
+                "Receipt %s not referenced: expense row %s was moved", reference, appended.row
+            )
+    except Exception:
+        logger.exception("Failed to write receipt reference to expense row %s", appended.row)
+
+
 def parse_expense_message(full_text: str) -> List[str]:
     """
     Parse and validate the full /expense message text.
@@ -184,11 +293,21 @@ def _starts_with_number(value: str) -> bool:
     return match is not None
 
 
-def register_expense_handlers(dp: Dispatcher, sheets_client: GoogleSheetsClient) -> None:
+def register_expense_handlers(
+    dp: Dispatcher,
+    sheets_client: GoogleSheetsClient,
+    fx_rates: FxRateTable | None = None,
+    receipt_store: ReceiptStore | None = None,
+    digest_aggregates: DigestAggregates | None = None,
+) -> None:
     """
     Register /expense handlers on the given Dispatcher and
-    store a reference to the GoogleSheetsClient instance.
+    store references to the GoogleSheetsClient, the optional FX rate table,
+    the optional receipt store and the optional digest aggregates.
     """
-    global _sheets_client
+    global _sheets_client, _fx_rates, _receipt_store, _digest_aggregates
     _sheets_client = sheets_client
+    _fx_rates = fx_rates
+    _receipt_store = receipt_store
+    _digest_aggregates = digest_aggregates
     dp.include_router(router)
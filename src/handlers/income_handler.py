@@ -1,16 +1,22 @@
 import logging
 import re
+from functools import partial
 from typing import List
 
 from aiogram import Dispatcher, Router, types
 from aiogram.filters import Command
 
+from ..currency import FxRateTable, parse_amount
+from ..digests import DigestAggregates
 from ..google_sheets_client import GoogleSheetsClient
+from ..profiling import span
 
 logger = logging.getLogger(__name__)
 router = Router()
 
 _sheets_client: GoogleSheetsClient | None = None
+_fx_rates: FxRateTable | None = None
+_digest_aggregates: DigestAggregates | None = None
 
 
 class IncomeValidationError(Exception):
@@ -35,7 +41,8 @@ async def handle_income(message: types.Message) -> None:
 
     text = message.text or ""
     try:
-        values = parse_income_message(text)
+        with span("parse_income_message"):
+            values = parse_income_message(text)
     except IncomeValidationError as e:
         # Validation error – send a clear message to the user
         await message.answer(str(e))
@@ -49,8 +56,31 @@ async def handle_income(message: types.Message) -> None:
         )
         return
 
+    # The amount feeds the base-currency column and digest totals; reject it
+    # if they cannot read it instead of silently leaving it out
+    amount_used = _fx_rates is not None or _digest_aggregates is not None
+    if amount_used and parse_amount(values[1]) is None:
+        await message.answer(
+            "Error in line 2: unable to parse amount. "
+            "Use a number followed by a currency code, e.g. 500 USD, 500 EUR, 500.00 USD."
+        )
+        return
+
+    # Optional extra column: amount normalized to the base currency
+    not_converted = False
+    if _fx_rates is not None:
+        base_total = _fx_rates.normalize(values[0], [(values[1], "")])
+        if not base_total:
+            logger.warning("No FX rate to convert /income amount %r on %s", values[1], values[0])
+            not_converted = True
+        values.append(base_total)
+
+    after_append = []
+    if _digest_aggregates is not None:
+        after_append.append(partial(_digest_aggregates.record_income, message.chat.id, values))
+
     try:
-        _sheets_client.append_income_row(values)
+        _sheets_client.append_income_row(values, after_append)
     except Exception:
         logger.exception("Failed to append income row to Google Sheets")
         await message.answer(
@@ -60,6 +90,12 @@ async def handle_income(message: types.Message) -> None:
         return
 
     # Success
+    if not_converted:
+        await message.answer(
+            f"Done, but the amount could not be converted to {_fx_rates.base_currency}: "
+            "no exchange rate for this date."
+        )
+        return
     await message.answer("Done")
 
 
@@ -171,11 +207,19 @@ def _starts_with_number(value: str) -> bool:
     return match is not None
 
 
-def register_income_handlers(dp: Dispatcher, sheets_client: GoogleSheetsClient) -> None:
+def register_income_handlers(
+    dp: Dispatcher,
+    sheets_client: GoogleSheetsClient,
+    fx_rates: FxRateTable | None = None,
+    digest_aggregates: DigestAggregates | None = None,
+) -> None:
     """
     Register /income handlers on the given Dispatcher and
-    store a reference to the GoogleSheetsClient instance.
+    store references to the GoogleSheetsClient, the optional FX rate table
+    and the optional digest aggregates.
     """
-    global _sheets_client
+    global _sheets_client, _fx_rates, _digest_aggregates
     _sheets_client = sheets_client
+    _fx_rates = fx_rates
+    _digest_aggregates = digest_aggregates
     dp.include_router(router)
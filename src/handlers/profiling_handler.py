@@ -0,0 +1,71 @@
+import logging
+from typing import List
+
+from aiogram import Dispatcher, Router, types
+from aiogram.filters import Command, CommandObject
+
+from ..profiling import UpdateProfiler
+
+logger = logging.getLogger(__name__)
+router = Router()
+
+_profiler: UpdateProfiler | None = None
+_admin_user_ids: List[int] = []
+
+# Number of updates profiled when /profile is sent without an argument
+DEFAULT_PROFILE_UPDATES = 50
+
+
+@router.message(Command("profile"))
+async def handle_profile(message: types.Message, command: CommandObject) -> None:
+    """
+    Handle the /profile command (administrators only).
+
+    /profile [N] – profile the next N updates (default: 50).
+    /profile off – stop profiling and write collected traces.
+    """
+    if message.from_user is None or message.from_user.id not in _admin_user_ids:
+        await message.answer("Error: this command is available to administrators only.")
+        return
+
+    if _profiler is None:
+        logger.error("UpdateProfiler is not initialized in profiling_handler.")
+        await message.answer(
+            "Error: internal configuration problem. Please contact the administrator."
+        )
+        return
+
+    argument = (command.args or "").strip().lower()
+
+    if argument == "off":
+        _profiler.stop()
+        await message.answer("Profiling stopped.")
+        return
+
+    if argument and (not argument.isdigit() or int(argument) == 0):
+        await message.answer(
+            "Error: usage is /profile N (a positive number of updates) or /profile off."
+        )
+        return
+
+    updates = int(argument) if argument else DEFAULT_PROFILE_UPDATES
+    _profiler.start(updates)
+    await message.answer(
+        f"Profiling enabled for the next {updates} updates.\n"
+        f"Output directory: {_profiler.output_dir}"
+    )
+
+
+def register_profiling_handlers(
+    dp: Dispatcher,
+    profiler: UpdateProfiler,
+    admin_user_ids: List[int],
+) -> None:
+    """
+    Register /profile handlers on the given Dispatcher and
+    store references to the UpdateProfiler and the list of administrators.
+    """
+    global _profiler, _admin_user_ids
+    _profiler = profiler
+    _admin_user_ids = admin_user_ids
+    dp.include_router(router)
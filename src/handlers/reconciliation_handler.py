@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from typing import List
+
+from aiogram import Dispatcher, Router, types
+from aiogram.filters import Command
+
+from ..reconciliation import Reconciler, format_report
+
+logger = logging.getLogger(__name__)
+router = Router()
+
+_reconciler: Reconciler | None = None
+_admin_user_ids: List[int] = []
+
+
+@router.message(Command("reconcile"))
+async def handle_reconcile(message: types.Message) -> None:
+    """
+    Handle the /reconcile command (administrators only).
+
+    Runs one reconciliation pass and replies with the rows that were
+    deleted, modified or inserted by hand.
+    """
+    if message.from_user is None or message.from_user.id not in _admin_user_ids:
+        await message.answer("Error: this command is available to administrators only.")
+        return
+
+    if _reconciler is None:
+        await message.answer(
+            "Error: reconciliation is not enabled. Set RECONCILIATION_DIR to enable it."
+        )
+        return
+
+    try:
+        report = await asyncio.to_thread(_reconciler.run)
+    except Exception:
+        logger.exception("Reconciliation run failed")
+        await message.answer(
+            "Error: unable to read the spreadsheet. "
+            "Please try again later or contact the administrator."
+        )
+        return
+
+    await message.answer(format_report(report))
+
+
+def register_reconciliation_handlers(
+    dp: Dispatcher,
+    reconciler: Reconciler | None,
+    admin_user_ids: List[int],
+) -> None:
+    """
+    Register /reconcile handlers on the given Dispatcher and
+    store references to the Reconciler and the list of administrators.
+    """
+    global _reconciler, _admin_user_ids
+    _reconciler = reconciler
+    _admin_user_ids = admin_user_ids
+    dp.include_router(router)
@@ -34,7 +34,8 @@ async def cmd_help(message: types.Message) -> None:
         "Here is how to use the bot.\n\n"
         "<b>General rules</b>\n"
         "• One message always creates exactly one record in the spreadsheet.\n"
-        "• The bot only appends rows and does not perform any calculations or currency conversion.\n\n"
+        "• The bot only appends rows. If an FX rate table is configured, it also adds "
+        "the amount converted to the base currency.\n\n"
         "<b>/income</b> – add a new income record\n"
         "The message after /income must contain 10 or 11 lines:\n"
         "1) Payment date (DD.MM.YY or DD.MM.YYYY)\n"
@@ -70,7 +71,8 @@ async def cmd_help(message: types.Message) -> None:
         "5) Expense name\n"
         "6) Manager\n"
         "7) Comment (optional)\n\n"
-        "At least one of lines 2–4 must contain a valid amount.\n\n"
+        "At least one of lines 2–4 must contain a valid amount.\n"
+        "To attach a receipt, send the template as the caption of a photo or document.\n\n"
         "Example:\n"
         "<pre>/expense\n"
         "24.12.2024\n"
@@ -0,0 +1,187 @@
+import contextlib
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, ContextManager, Dict, List, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import GetUpdates, TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+logger = logging.getLogger(__name__)
+
+# Profiler of the running session; None when profiling is disabled
+_active: Optional["UpdateProfiler"] = None
+
+# Sampled update currently being handled; used as the "thread" of trace events.
+# None outside sampled updates, so spans from other updates are not recorded.
+_current_update: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "current_update", default=None
+)
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def span(name: str) -> ContextManager[Any]:
+    """
+    Return a context manager that records a tracing span while profiling is active.
+
+    When profiling is disabled, or the code does not run as part of a sampled
+    update, this returns a shared no-op context manager, so instrumented code
+    pays only for a global lookup.
+    """
+    if _active is None or _current_update.get() is None:
+        return _NULL_SPAN
+    return _active.span(name)
+
+
+class UpdateProfiler(BaseMiddleware):
+    """
+    Outer update middleware that profiles a limited number of updates.
+
+    A profiling window lasts from the first sampled update until the last
+    one has been handled. During the window it:
+    - runs cProfile, written to ``profile-<timestamp>.pstats`` when the
+      window ends;
+    - records tracing spans (see ``span``) of sampled updates, written to a
+      Chrome trace JSON file (``trace-<timestamp>.json``) when the window ends.
+
+    cProfile covers the whole event loop thread, including updates and
+    background tasks (receipt downloads, digests) that run while a sampled
+    update awaits, so the statistics describe the window, not single updates.
+    Use the trace for per-update timings.
+    """
+
+    def __init__(self, output_dir: str) -> None:
+        self.output_dir = Path(output_dir)
+        self._remaining = 0
+        self._in_flight = 0
+        self._profile: Optional[cProfile.Profile] = None
+        self._events: List[Dict[str, Any]] = []
+
+    @property
+    def active(self) -> bool:
+        return self._remaining > 0 or self._in_flight > 0
+
+    def start(self, updates: int) -> None:
+        """Enable profiling for the next ``updates`` updates."""
+        global _active
+        self._remaining = updates
+        _active = self
+        logger.info("Profiling enabled for the next %d updates", updates)
+
+    def stop(self) -> None:
+        """Stop sampling new updates; the window ends once in-flight updates finish."""
+        self._remaining = 0
+        if self._in_flight == 0:
+            self._finish()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        if self._remaining <= 0:
+            return await handler(event, data)
+
+        self._remaining -= 1
+        self._in_flight += 1
+        update_id = event.update_id if isinstance(event, Update) else 0
+        token = _current_update.set(update_id)
+
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+        try:
+            with self.span("update"):
+                return await handler(event, data)
+        finally:
+            _current_update.reset(token)
+            self._in_flight -= 1
+            if not self.active:
+                self._finish()
+
+    @contextlib.contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._events.append(
+                {
+                    "name": name,
+                    "cat": "bot",
+                    "ph": "X",
+                    "ts": start * 1_000_000,
+                    "dur": (end - start) * 1_000_000,
+                    "pid": os.getpid(),
+                    "tid": _current_update.get(),
+                }
+            )
+
+    # --- Internal helpers ---
+
+    def _dump_stats(self, profile: cProfile.Profile, timestamp: str) -> None:
+        path = self.output_dir / f"profile-{timestamp}.pstats"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(path)
+        except Exception:
+            logger.exception("Failed to write profile %s", path)
+
+    def _finish(self) -> None:
+        """End the profiling window: write statistics and trace events, disable spans."""
+        global _active
+        if _active is self:
+            _active = None
+
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        profile, self._profile = self._profile, None
+        if profile is not None:
+            profile.disable()
+            self._dump_stats(profile, timestamp)
+
+        events, self._events = self._events, []
+        if not events:
+            return
+
+        path = self.output_dir / f"trace-{timestamp}.json"
+        try:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        except Exception:
+            logger.exception("Failed to write trace file %s", path)
+            return
+
+        logger.info("Profiling finished, trace written to %s", path)
+
+
+class TracingRequestMiddleware(BaseRequestMiddleware):
+    """
+    Bot session middleware that records a span for every Telegram API call
+    made while handling a sampled update (e.g. ``telegram.SendMessage`` for
+    ``message.answer``). Long-polling ``GetUpdates`` calls are not traced.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Any:
+        if isinstance(method, GetUpdates):
+            return await make_request(bot, method)
+        with span(f"telegram.{type(method).__name__}"):
+            return await make_request(bot, method)
@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path, PurePosixPath
+from typing import IO, Any, Dict
+
+from aiogram import Bot
+
+from .profiling import span
+
+logger = logging.getLogger(__name__)
+
+
+class ReceiptStore:
+    """
+    Local content-addressed store for receipt files (photos and documents).
+
+    Files are streamed from Telegram in chunks, hashed with SHA-256 while
+    being written and stored as ``<root>/<first 2 hex chars>/<sha256><ext>``.
+    The same receipt sent twice is stored only once.
+
+    The number of concurrent downloads is limited, so many large files
+    cannot saturate the connection or the disk.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_concurrent_downloads: int = 4,
+        download_timeout: int = 600,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.root = Path(root)
+        self.download_timeout = download_timeout
+        self.chunk_size = chunk_size
+        self._semaphore = asyncio.Semaphore(max_concurrent_downloads)
+        # Telegram file_unique_id -> stored reference, to skip repeated downloads
+        self._known: Dict[str, str] = {}
+
+    async def save_from_telegram(self, bot: Bot, file_id: str, file_unique_id: str) -> str:
+        """
+        Download a Telegram file into the store.
+
+        Disk writes and hashing run in a worker thread, so a slow disk does not
+        block the event loop.
+
+        :param bot: Bot instance used to download the file.
+        :param file_id: Telegram file_id of the photo or document.
+        :param file_unique_id: Telegram file_unique_id (stable across chats and bots).
+        :return: Reference to the stored file, relative to the store root.
+        """
+        if file_unique_id in self._known:
+            return self._known[file_unique_id]
+
+        async with self._semaphore:
+            with span("ReceiptStore.save_from_telegram"):
+                file = await bot.get_file(file_id)
+                url = bot.session.api.file_url(bot.token, file.file_path)
+                suffix = PurePosixPath(file.file_path or "").suffix.lower()
+
+                tmp = await asyncio.to_thread(self._open_tmp)
+                digest = hashlib.sha256()
+                try:
+                    # aiogram's default timeout (30 s) is too short for large documents
+                    async for chunk in bot.session.stream_content(
+                        url=url,
+                        timeout=self.download_timeout,
+                        chunk_size=self.chunk_size,
+                        raise_for_status=True,
+                    ):
+                        await asyncio.to_thread(self._write_chunk, tmp, digest, chunk)
+                    await asyncio.to_thread(tmp.close)
+                except BaseException:
+                    tmp.close()
+                    os.unlink(tmp.name)
+                    raise
+
+                reference = await asyncio.to_thread(
+                    self._store, tmp.name, digest.hexdigest(), suffix
+                )
+
+        self._known[file_unique_id] = reference
+        return reference
+
+    # --- Internal helpers ---
+
+    def _open_tmp(self) -> IO[bytes]:
+        tmp_dir = self.root / "tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=tmp_dir, delete=False)
+
+    @staticmethod
+    def _write_chunk(tmp: IO[bytes], digest: Any, chunk: bytes) -> None:
+        digest.update(chunk)
+        tmp.write(chunk)
+
+    def _store(self, tmp_path: str, key: str, suffix: str) -> str:
+        """Move a downloaded file to its content address, or drop it if already stored."""
+        reference = f"{key[:2]}/{key}{suffix}"
+        path = self.root / reference
+
+        if path.exists():
+            os.unlink(tmp_path)
+            logger.info("Receipt %s is already stored", reference)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, path)
+            logger.info("Stored receipt %s", reference)
+
+        return reference
@@ -0,0 +1,491 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    import gspread
+
+logger = logging.getLogger(__name__)
+
+# Rows read after each block so changes at a block boundary are aligned correctly
+_LOOKAHEAD_ROWS = 20
+
+
+def hash_row(values: Sequence[Any]) -> str:
+    """
+    Return a short checksum of a row.
+
+    Values are compared as displayed text; trailing empty cells are ignored
+    because the Sheets API omits them when reading.
+    """
+    cells = [str(value).strip() for value in values]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return hashlib.sha1("\x1f".join(cells).encode("utf-8")).hexdigest()[:16]
+
+
+def _hash_block(rows: Dict[int, str]) -> str:
+    """Return a checksum of a block given its row number -> row hash mapping."""
+    payload = ";".join(f"{row}:{rows[row]}" for row in sorted(rows))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class AppendLedger:
+    """
+    Append-only record of the rows written by the bot.
+
+    Rows are numbered in append order: the first append keeps the sheet row
+    it landed on and every later append takes the next number, i.e. the row
+    it would have if nobody edited the sheet by hand. Hand edits shift sheet
+    rows, so the sheet row an append lands on is kept for information only;
+    reconciliation aligns the sheet against this sequence.
+
+    Each write is stored as one JSON line (sheet, ledger row, row hash), so
+    recording a write never rewrites the whole file. A later line for the
+    same ledger row (after the bot updated a cell) replaces the earlier one.
+
+    Every line also stores the spreadsheet revision (Drive modified time)
+    just before and just after the write, so reconciliation can tell
+    revision changes caused only by the bot from hand edits.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self._rows: Dict[str, Dict[int, str]] = {}
+        # revision before a bot write -> revision after it
+        self._bot_revisions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._apply(json.loads(line))
+
+    def record_append(
+        self,
+        sheet_name: str,
+        sheet_row: int,
+        values: Sequence[Any],
+        revisions: Tuple[Optional[str], Optional[str]] = (None, None),
+    ) -> int:
+        """
+        Record a row appended by the bot.
+
+        :param sheet_name: Worksheet the row was appended to.
+        :param sheet_row: Sheet row number the row landed on.
+        :param values: Row values as rendered by Google Sheets (what is read back).
+        :param revisions: Spreadsheet revision just before and just after the append.
+        :return: Ledger row number of the appended row.
+        """
+        with self._lock:
+            rows = self._rows.get(sheet_name)
+            row = max(rows) + 1 if rows else sheet_row
+            self._write({
+                "sheet": sheet_name,
+                "row": row,
+                "sheet_row": sheet_row,
+                "hash": hash_row(values),
+                "before": revisions[0],
+                "after": revisions[1],
+            })
+        return row
+
+    def record_update(
+        self,
+        sheet_name: str,
+        row: int,
+        values: Sequence[Any],
+        revisions: Tuple[Optional[str], Optional[str]] = (None, None),
+    ) -> None:
+        """
+        Record new content of a row the bot appended earlier (e.g. after updating a cell).
+
+        :param sheet_name: Worksheet of the row.
+        :param row: Ledger row number returned by ``record_append``.
+        :param values: New row values as rendered by Google Sheets.
+        :param revisions: Spreadsheet revision just before and just after the update.
+        """
+        with self._lock:
+            self._write({
+                "sheet": sheet_name,
+                "row": row,
+                "hash": hash_row(values),
+                "before": revisions[0],
+                "after": revisions[1],
+            })
+
+    def snapshot(self, sheet_name: str) -> Dict[int, str]:
+        """Return a copy of the ledger row number -> row hash mapping for a worksheet."""
+        with self._lock:
+            return dict(self._rows.get(sheet_name, {}))
+
+    def written_by_bot_only(self, since: str, until: str) -> bool:
+        """
+        Return True if the spreadsheet went from revision ``since`` to ``until``
+        through bot writes only, i.e. there is an unbroken chain of recorded
+        writes, each starting at the revision the previous one ended at.
+        """
+        with self._lock:
+            revision: Optional[str] = since
+            # Bounded walk, in case a clock change ever produced a cycle
+            for _ in range(len(self._bot_revisions) + 1):
+                if revision == until:
+                    return True
+                revision = self._bot_revisions.get(revision)
+                if revision is None:
+                    return False
+            return False
+
+    # --- Internal helpers ---
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._apply(entry)
+
+    def _apply(self, entry: Dict[str, Any]) -> None:
+        self._rows.setdefault(entry["sheet"], {})[entry["row"]] = entry["hash"]
+        before, after = entry.get("before"), entry.get("after")
+        # A write whose revisions are unknown (or did not change) breaks the chain
+        if before is not None and after is not None and before != after:
+            self._bot_revisions[before] = after
+
+
+@dataclass
+class Discrepancy:
+    """Difference between what the bot appended and what is in the sheet."""
+
+    sheet_name: str
+    row: int
+    kind: str  # "deleted", "modified" or "inserted"
+
+
+@dataclass
+class ReconciliationReport:
+    """Result of a single reconciliation run."""
+
+    blocks_checked: int = 0
+    blocks_pending: int = 0
+    api_reads: int = 0
+    discrepancies: List[Discrepancy] = field(default_factory=list)
+
+
+def compare_block(
+    sheet_name: str,
+    expected_rows: Dict[int, str],
+    actual: List[str],
+    start: int,
+    end: int,
+    offset: int,
+) -> Tuple[List[Discrepancy], int]:
+    """
+    Compare one block of the sheet with the rows the bot appended.
+
+    Rows are aligned as sequences, so rows that only moved (e.g. after a
+    row above was deleted or inserted by hand) are not reported. The shift
+    between sheet and ledger positions is carried from block to block.
+
+    :param sheet_name: Worksheet name, used in the reported discrepancies.
+    :param expected_rows: All ledger rows of the worksheet (ledger row -> row hash).
+    :param actual: Hashes of the sheet rows starting at row ``start`` ("" for empty rows).
+        Rows after ``end`` are a lookahead: they are used for alignment only, so a
+        change at the end of the block is not mistaken for an edit.
+    :param start: Sheet row number of ``actual[0]``.
+    :param end: Last sheet row of the block.
+    :param offset: Sheet row minus ledger row at the start of the block
+        (the ``offset`` returned for the previous block).
+    :return: Discrepancies in the block (deleted rows use the ledger row number,
+        modified and inserted rows the sheet row number) and the offset at the
+        end of the block.
+    """
+    window = [
+        (row, expected_rows[row])
+        for row in sorted(expected_rows)
+        if start <= row + offset <= start + 2 * len(actual)
+    ]
+    matcher = SequenceMatcher(None, [h for _, h in window], actual, autojunk=False)
+
+    # Walk the alignment in sheet order until it leaves the block
+    discrepancies: List[Discrepancy] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            if start + j1 > end:
+                break
+            last = min(j2, end - start + 1)
+            offset = (start + last - 1) - window[i1 + last - 1 - j1][0]
+            continue
+
+        # Pairs of a ledger row and a sheet row at the same position were edited in place
+        pairs = min(i2 - i1, j2 - j1)
+        for k in range(pairs):
+            if start + j1 + k > end:
+                return discrepancies, offset
+            if actual[j1 + k] == "":
+                discrepancies.append(Discrepancy(sheet_name, window[i1 + k][0], "deleted"))
+            else:
+                discrepancies.append(Discrepancy(sheet_name, start + j1 + k, "modified"))
+
+        for row, _ in window[i1 + pairs:i2]:
+            if row + offset > end:
+                return discrepancies, offset
+            discrepancies.append(Discrepancy(sheet_name, row, "deleted"))
+            offset -= 1
+
+        # Empty rows are not reported; empty rows between data are accounted
+        # for by the next matched row
+        for j in range(j1 + pairs, j2):
+            if start + j > end:
+                return discrepancies, offset
+            if actual[j] != "":
+                discrepancies.append(Discrepancy(sheet_name, start + j, "inserted"))
+                offset += 1
+
+    return discrepancies, offset
+
+
+class Reconciler:
+    """
+    Incremental reconciliation of bot-appended rows with the spreadsheet.
+
+    Worksheets are split into blocks of ``block_size`` rows. For every block
+    the reconciler keeps the checksum of the ledger rows in it, the
+    spreadsheet revision (Drive modified time) at which it was last read,
+    the row shift at its start and end, and the discrepancies found.
+
+    A run re-reads only blocks whose checksum or starting shift changed, or
+    whose revision changed through anything other than the bot's own writes
+    (see ``AppendLedger.written_by_bot_only``). Reads use a single ranged
+    ``batch_get`` per worksheet and at most ``max_blocks_per_run`` blocks. Blocks left over are picked up by the next
+    runs (least recently checked first). Discrepancies of blocks that were
+    not re-read are reported from the saved state until they are resolved.
+
+    Rows above the first row recorded in the ledger are not checked.
+    """
+
+    def __init__(
+        self,
+        spreadsheet: "gspread.Spreadsheet",
+        ledger: AppendLedger,
+        sheet_names: List[str],
+        state_path: str,
+        block_size: int = 500,
+        max_blocks_per_run: int = 20,
+    ) -> None:
+        self.spreadsheet = spreadsheet
+        self.ledger = ledger
+        self.sheet_names = sheet_names
+        self.state_path = Path(state_path)
+        self.block_size = block_size
+        self.max_blocks_per_run = max_blocks_per_run
+
+        self._lock = threading.Lock()
+        self._run = 0
+        # sheet name -> block index (as string, JSON keys) -> block state
+        self._blocks: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        if self.state_path.exists():
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            self._run = state.get("run", 0)
+            self._blocks = state.get("blocks", {})
+
+    def run(self) -> ReconciliationReport:
+        """
+        Check the blocks that may have changed and report discrepancies.
+
+        This method performs blocking network calls; run it in a worker thread
+        when called from the event loop.
+        """
+        with self._lock:
+            return self._run_once()
+
+    # --- Internal helpers ---
+
+    def _run_once(self) -> ReconciliationReport:
+        self._run += 1
+        report = ReconciliationReport()
+
+        # Drive modified time of the spreadsheet, fetched fresh on every run
+        revision = self.spreadsheet.get_lastUpdateTime()
+        report.api_reads += 1
+
+        expected: Dict[str, Dict[int, str]] = {}
+        block_ranges: Dict[str, range] = {}
+        # (priority, last checked run, sheet position, block index, sheet name)
+        candidates: List[Tuple[int, int, int, int, str]] = []
+        # block revision -> whether only the bot wrote between it and the current one
+        bot_only: Dict[str, bool] = {}
+
+        for position, sheet_name in enumerate(self.sheet_names):
+            expected_rows = self.ledger.snapshot(sheet_name)
+            if not expected_rows:
+                continue
+            expected[sheet_name] = expected_rows
+            sheet_blocks = self._blocks.setdefault(sheet_name, {})
+
+            # One extra block after the last bot row (shifted by rows inserted by hand)
+            # catches rows added at the end of the sheet
+            shift = max([0] + [state["offset_end"] for state in sheet_blocks.values()])
+            blocks = range(
+                self._block_of(min(expected_rows)),
+                self._block_of(max(expected_rows) + shift) + 2,
+            )
+            block_ranges[sheet_name] = blocks
+
+            previous_offset = 0
+            for block in blocks:
+                state = sheet_blocks.get(str(block))
+                if (
+                    state is None
+                    or state["expected"] != self._expected_hash(expected_rows, block)
+                    or state["offset_start"] != previous_offset
+                ):
+                    checked = state["checked"] if state else 0
+                    candidates.append((0, checked, position, block, sheet_name))
+                elif state["revision"] != revision:
+                    if state["revision"] not in bot_only:
+                        bot_only[state["revision"]] = self.ledger.written_by_bot_only(
+                            state["revision"], revision
+                        )
+                    if bot_only[state["revision"]]:
+                        # Only the bot wrote since the last read, and not into this block
+                        state["revision"] = revision
+                    else:
+                        candidates.append((1, state["checked"], position, block, sheet_name))
+                previous_offset = state["offset_end"] if state else previous_offset
+
+        candidates.sort()
+        selected = candidates[: self.max_blocks_per_run]
+        report.blocks_pending = len(candidates) - len(selected)
+
+        for sheet_name in self.sheet_names:
+            blocks = sorted(block for *_, block, name in selected if name == sheet_name)
+            if not blocks:
+                continue
+
+            worksheet = self.spreadsheet.worksheet(sheet_name)
+            results = worksheet.batch_get([self._block_range(block) for block in blocks])
+            # Worksheet metadata lookup + one batch_get for all selected blocks
+            report.api_reads += 2
+
+            first_row = min(expected[sheet_name])
+            sheet_blocks = self._blocks[sheet_name]
+            for block, values in zip(blocks, results):
+                self._check_block(sheet_name, expected[sheet_name], block, values, first_row)
+                sheet_blocks[str(block)]["revision"] = revision
+                report.blocks_checked += 1
+
+        for sheet_name, blocks in block_ranges.items():
+            for block in blocks:
+                state = self._blocks[sheet_name].get(str(block))
+                if state is not None:
+                    report.discrepancies.extend(
+                        Discrepancy(sheet_name, row, kind) for row, kind in state["discrepancies"]
+                    )
+
+        self._save()
+        return report
+
+    def _check_block(
+        self,
+        sheet_name: str,
+        expected_rows: Dict[int, str],
+        block: int,
+        values: List[List[Any]],
+        first_row: int,
+    ) -> None:
+        """Compare one block read from the sheet and store its new state."""
+        sheet_blocks = self._blocks[sheet_name]
+        previous = sheet_blocks.get(str(block - 1))
+        offset_start = previous["offset_end"] if previous else 0
+
+        start = block * self.block_size + 1
+        end = start + self.block_size - 1
+        # The API omits trailing empty rows; pad them so every read has the same length
+        actual = [hash_row(row) if any(str(v).strip() for v in row) else "" for row in values]
+        actual += [""] * (self.block_size + _LOOKAHEAD_ROWS - len(actual))
+        if start < first_row:
+            actual = actual[first_row - start:]
+            start = first_row
+
+        discrepancies, offset_end = compare_block(
+            sheet_name, expected_rows, actual, start, end, offset_start
+        )
+        sheet_blocks[str(block)] = {
+            "expected": self._expected_hash(expected_rows, block),
+            "checked": self._run,
+            "offset_start": offset_start,
+            "offset_end": offset_end,
+            "discrepancies": [[d.row, d.kind] for d in discrepancies],
+        }
+
+    def _expected_hash(self, expected_rows: Dict[int, str], block: int) -> str:
+        """Checksum of the ledger rows that were appended into the block."""
+        start = block * self.block_size + 1
+        rows = range(start, start + self.block_size)
+        return _hash_block({row: expected_rows[row] for row in rows if row in expected_rows})
+
+    def _block_of(self, row: int) -> int:
+        return (row - 1) // self.block_size
+
+    def _block_range(self, block: int) -> str:
+        """A1 range of the block's rows plus the lookahead rows after it."""
+        start = block * self.block_size + 1
+        return f"{start}:{start + self.block_size + _LOOKAHEAD_ROWS - 1}"
+
+    def _save(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"run": self._run, "blocks": self._blocks}, f)
+        os.replace(tmp_path, self.state_path)
+
+
+def format_report(report: ReconciliationReport, limit: int = 20) -> str:
+    """
+    Format a reconciliation report as a short human-readable text.
+
+    :param report: Report to format.
+    :param limit: Maximum number of discrepancies listed individually.
+    """
+    lines = [
+        f"Reconciliation: {report.blocks_checked} blocks checked, "
+        f"{report.api_reads} API reads, {report.blocks_pending} blocks pending."
+    ]
+    if not report.discrepancies:
+        lines.append("No differences found.")
+        return "\n".join(lines)
+
+    for d in report.discrepancies[:limit]:
+        lines.append(f"{d.sheet_name} row {d.row}: {d.kind}")
+    if len(report.discrepancies) > limit:
+        lines.append(f"... and {len(report.discrepancies) - limit} more.")
+    return "\n".join(lines)
+
+
+async def run_periodically(reconciler: Reconciler, interval_minutes: int) -> None:
+    """
+    Run reconciliation every ``interval_minutes`` minutes and log the results.
+
+    Each run is executed in a worker thread so it does not block update handling.
+    """
+    while True:
+        await asyncio.sleep(interval_minutes * 60)
+        try:
+            report = await asyncio.to_thread(reconciler.run)
+        except Exception:
+            logger.exception("Reconciliation run failed")
+            continue
+
+        if report.discrepancies:
+            logger.warning("%s", format_report(report))
+        else:
+            logger.info("%s", format_report(report))
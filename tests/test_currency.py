@@ -0,0 +1,58 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.currency import FxRateTable, ParsedAmount, parse_amount
+
+
+@pytest.mark.parametrize(
+    "text, default_currency, expected",
+    [
+        ("319 USD", "", ParsedAmount(Decimal("319"), "USD")),
+        ("120 000 KZT", "", ParsedAmount(Decimal("120000"), "KZT")),
+        ("1,000 USD", "", ParsedAmount(Decimal("1000"), "USD")),
+        ("120,000 KZT", "", ParsedAmount(Decimal("120000"), "KZT")),
+        ("1.500,50 EUR", "", ParsedAmount(Decimal("1500.50"), "EUR")),
+        ("1,000.50 USD", "", ParsedAmount(Decimal("1000.50"), "USD")),
+        ("12,5", "EUR", ParsedAmount(Decimal("12.5"), "EUR")),
+        ("0.125 BTC", "", ParsedAmount(Decimal("0.125"), "BTC")),
+        ("276€", "", ParsedAmount(Decimal("276"), "EUR")),
+        ("$319", "", ParsedAmount(Decimal("319"), "USD")),
+        ("319", "usd", ParsedAmount(Decimal("319"), "USD")),
+    ],
+)
+def test_parse_amount(text, default_currency, expected):
+    assert parse_amount(text, default_currency) == expected
+
+
+@pytest.mark.parametrize(
+    "text, default_currency",
+    [
+        ("500 USDT", "EUR"),
+        ("500 USD cash", ""),
+        ("$5 USD", ""),
+        ("1,000,50", "USD"),
+        ("1.2.3", "USD"),
+        ("319", ""),
+        ("USD 319", ""),
+        ("", "USD"),
+    ],
+)
+def test_parse_amount_rejects_invalid_text(text, default_currency):
+    assert parse_amount(text, default_currency) is None
+
+
+def test_normalize_uses_latest_rate_on_or_before_date():
+    table = FxRateTable.from_rows(
+        [
+            (date(2024, 12, 20), "EUR", Decimal("1.10")),
+            (date(2024, 12, 23), "EUR", Decimal("1.20")),
+        ],
+        "USD",
+    )
+
+    assert table.normalize("24.12.2024", [("100 USD", ""), ("10 EUR", "")]) == "112.00"
+    assert table.normalize("21.12.24", [("10 EUR", "")]) == "11.00"
+    assert table.normalize("19.12.2024", [("10 EUR", "")]) == ""
+    assert table.normalize("24.12.2024", [("10 XXX", "")]) == ""
@@ -0,0 +1,147 @@
+import asyncio
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from src.currency import FxRateTable
+from src.digests import DigestAggregates, DigestSchedule, DigestScheduler
+
+# A Monday
+NOW = datetime(2026, 10, 19, 9, 0)
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        self.sent.append((chat_id, text))
+
+
+def _expense(day, name="Rent", usd="100"):
+    return [day.strftime("%d.%m.%Y"), usd, "", "", name, "Anna", ""]
+
+
+def _run_one_tick(scheduler):
+    """Run the scheduler until it goes to sleep after its first pass."""
+
+    async def run():
+        try:
+            await asyncio.wait_for(scheduler.run(), timeout=0.2)
+        except asyncio.TimeoutError:
+            pass
+
+    asyncio.run(run())
+
+
+def test_daily_due_time_around_the_scheduled_minute():
+    schedule = DigestSchedule(1, "daily", time(9, 0))
+
+    assert schedule.latest_due(NOW) == NOW
+    assert schedule.latest_due(NOW - timedelta(minutes=1)) == NOW - timedelta(days=1)
+
+
+def test_weekly_due_time_around_the_scheduled_minute():
+    schedule = DigestSchedule(1, "weekly", time(9, 0), weekday=0)
+
+    assert schedule.latest_due(NOW) == NOW
+    assert schedule.latest_due(NOW - timedelta(minutes=1)) == NOW - timedelta(days=7)
+    # Sunday evening belongs to the week that started on the previous Monday
+    assert schedule.latest_due(NOW - timedelta(hours=1, days=1)) == NOW - timedelta(days=7)
+
+
+def test_catch_up_after_a_multi_day_gap():
+    schedule = DigestSchedule(1, "daily", time(9, 0))
+    last_run = NOW - timedelta(days=3)
+
+    assert schedule.missed_due(last_run, NOW + timedelta(hours=2)) == [
+        NOW - timedelta(days=2),
+        NOW - timedelta(days=1),
+        NOW,
+    ]
+    assert schedule.missed_due(NOW, NOW + timedelta(hours=2)) == []
+
+
+def test_catch_up_skips_periods_that_are_already_pruned():
+    daily = DigestSchedule(1, "daily", time(9, 0))
+    weekly = DigestSchedule(1, "weekly", time(9, 0), weekday=0)
+    last_run = NOW - timedelta(days=30)
+
+    # The weekly digest due 14 days ago covers days 21..15 ago, which are no longer kept
+    assert weekly.missed_due(last_run, NOW) == [NOW - timedelta(days=7), NOW]
+
+    missed = daily.missed_due(last_run, NOW)
+    assert missed[0] == NOW - timedelta(days=13)
+    assert missed[-1] == NOW
+
+
+def test_first_start_does_not_post_missed_digests(tmp_path):
+    aggregates = DigestAggregates(str(tmp_path / "digests.json"))
+    schedule = DigestSchedule(1, "daily", time(9, 0))
+    bot = FakeBot()
+
+    _run_one_tick(DigestScheduler(bot, aggregates, [schedule]))
+
+    assert bot.sent == []
+    assert schedule.key in aggregates.last_runs
+
+
+def test_restart_posts_every_missed_digest(tmp_path):
+    aggregates = DigestAggregates(str(tmp_path / "digests.json"))
+    schedule = DigestSchedule(1, "daily", time(9, 0))
+    latest = schedule.latest_due(datetime.now())
+    aggregates.last_runs[schedule.key] = (latest - timedelta(days=3)).isoformat()
+    bot = FakeBot()
+
+    _run_one_tick(DigestScheduler(bot, aggregates, [schedule]))
+
+    assert len(bot.sent) == 3
+    assert aggregates.last_runs[schedule.key] == latest.isoformat()
+
+
+def test_records_are_bucketed_by_record_date(tmp_path):
+    aggregates = DigestAggregates(str(tmp_path / "digests.json"))
+    today = date.today()
+    aggregates.record_expense(1, _expense(today - timedelta(days=3)))
+    aggregates.record_expense(1, ["not a date", "5", "", "", "Taxi", "Anna", ""])
+
+    three_days_ago = aggregates.format_digest(1, today - timedelta(days=2), 1)
+    assert "<b>Expenses</b> – 1 records" in three_days_ago
+    assert "USD 100.00" in three_days_ago
+
+    # An unparsable date falls back to today
+    assert "<b>Expenses</b> – 1 records" in aggregates.format_digest(1, today + timedelta(days=1), 1)
+
+
+def test_buckets_older_than_keep_days_are_pruned(tmp_path):
+    path = str(tmp_path / "digests.json")
+    aggregates = DigestAggregates(path)
+    today = date.today()
+    aggregates.record_expense(1, _expense(today - timedelta(days=15)))
+    aggregates.record_expense(1, _expense(today - timedelta(days=14)))
+
+    reloaded = DigestAggregates(path)
+    assert "– 0 records" in reloaded.format_digest(1, today - timedelta(days=14), 1)
+    assert "– 1 records" in reloaded.format_digest(1, today - timedelta(days=13), 1)
+
+
+def test_top_expenses_rank_by_base_total_with_fx(tmp_path):
+    fx_rates = FxRateTable.from_rows([(date(2020, 1, 1), "EUR", Decimal("2"))], "USD")
+    aggregates = DigestAggregates(str(tmp_path / "digests.json"), fx_rates)
+    today = date.today()
+    aggregates.record_expense(1, _expense(today, "Rent", "100"))
+    for _ in range(3):
+        aggregates.record_expense(1, [today.strftime("%d.%m.%Y"), "", "10", "", "Taxi", "Anna", ""])
+
+    text = aggregates.format_digest(1, today + timedelta(days=1), 1)
+    assert "Top expenses (USD): Rent 100.00, Taxi 60.00" in text
+
+
+def test_top_expenses_without_fx_are_labelled_most_frequent(tmp_path):
+    aggregates = DigestAggregates(str(tmp_path / "digests.json"))
+    today = date.today()
+    aggregates.record_expense(1, _expense(today, "Rent"))
+    aggregates.record_expense(1, _expense(today, "Taxi", "5"))
+    aggregates.record_expense(1, _expense(today, "Taxi", "5"))
+
+    text = aggregates.format_digest(1, today + timedelta(days=1), 1)
+    assert "Most frequent expenses: Taxi (2), Rent (1)" in text
@@ -0,0 +1,224 @@
+from src.reconciliation import AppendLedger, Discrepancy, Reconciler, compare_block, hash_row
+
+
+class FakeWorksheet:
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = 0
+
+    def batch_get(self, ranges):
+        self.reads += 1
+        results = []
+        for a1_range in ranges:
+            start, end = (int(part) for part in a1_range.split(":"))
+            values = [list(row) for row in self.rows[start - 1:end]]
+            # Like the Sheets API, trailing empty rows are omitted
+            while values and not any(values[-1]):
+                values.pop()
+            results.append(values)
+        return results
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheets):
+        self.worksheets = worksheets
+        self.revision = 1
+
+    def get_lastUpdateTime(self):
+        return str(self.revision)
+
+    def worksheet(self, name):
+        return self.worksheets[name]
+
+
+def _make(tmp_path, rows=30, block_size=5, max_blocks_per_run=100):
+    """Sheet with a header row and bot rows 2..rows, all recorded in the ledger."""
+    sheet_rows = [["Header"]] + [[f"value {row}", "x"] for row in range(2, rows + 1)]
+    ledger = AppendLedger(str(tmp_path / "ledger.jsonl"))
+    for row in range(2, rows + 1):
+        ledger.record_append("Income", row, sheet_rows[row - 1])
+
+    spreadsheet = FakeSpreadsheet({"Income": FakeWorksheet(sheet_rows)})
+    reconciler = Reconciler(
+        spreadsheet,
+        ledger,
+        ["Income"],
+        str(tmp_path / "state.json"),
+        block_size=block_size,
+        max_blocks_per_run=max_blocks_per_run,
+    )
+    return spreadsheet, sheet_rows, reconciler
+
+
+def _bot_append(spreadsheet, rows, reconciler, values):
+    """Append a row the way GoogleSheetsClient does: below the last row, recorded with revisions."""
+    before = spreadsheet.get_lastUpdateTime()
+    rows.append(values)
+    spreadsheet.revision += 1
+    reconciler.ledger.record_append(
+        "Income", len(rows), values, (before, spreadsheet.get_lastUpdateTime())
+    )
+
+
+def test_clean_sheet_has_no_discrepancies_and_unchanged_sheet_is_not_read(tmp_path):
+    spreadsheet, _, reconciler = _make(tmp_path)
+
+    assert reconciler.run().discrepancies == []
+
+    report = reconciler.run()
+    assert report.blocks_checked == 0
+    assert report.api_reads == 1
+
+
+def test_deleted_row_is_reported_once_without_boundary_noise(tmp_path):
+    spreadsheet, rows, reconciler = _make(tmp_path)
+    reconciler.run()
+
+    del rows[2]  # sheet row 3
+    spreadsheet.revision += 1
+
+    assert reconciler.run().discrepancies == [Discrepancy("Income", 3, "deleted")]
+
+
+def test_inserted_row_is_reported_without_boundary_noise(tmp_path):
+    spreadsheet, rows, reconciler = _make(tmp_path)
+    reconciler.run()
+
+    rows.insert(3, ["added by hand"])  # sheet row 4
+    spreadsheet.revision += 1
+
+    assert reconciler.run().discrepancies == [Discrepancy("Income", 4, "inserted")]
+
+
+def test_modified_and_cleared_rows(tmp_path):
+    spreadsheet, rows, reconciler = _make(tmp_path)
+    reconciler.run()
+
+    rows[11] = ["edited", "x"]  # sheet row 12
+    rows[19] = []  # sheet row 20
+    rows.append(["added at the end"])  # sheet row 31
+    spreadsheet.revision += 1
+
+    assert reconciler.run().discrepancies == [
+        Discrepancy("Income", 12, "modified"),
+        Discrepancy("Income", 20, "deleted"),
+        Discrepancy("Income", 31, "inserted"),
+    ]
+
+
+def test_unresolved_discrepancies_are_reported_until_fixed(tmp_path):
+    spreadsheet, rows, reconciler = _make(tmp_path)
+    reconciler.run()
+
+    original = rows[11]
+    rows[11] = ["edited", "x"]
+    spreadsheet.revision += 1
+    reconciler.run()
+
+    report = reconciler.run()
+    assert report.blocks_checked == 0
+    assert report.discrepancies == [Discrepancy("Income", 12, "modified")]
+
+    rows[11] = original
+    spreadsheet.revision += 1
+    assert reconciler.run().discrepancies == []
+
+
+def test_reads_are_bounded_per_run(tmp_path):
+    spreadsheet, _, reconciler = _make(tmp_path, rows=100, block_size=10, max_blocks_per_run=3)
+
+    report = reconciler.run()
+    assert report.blocks_checked == 3
+    assert report.blocks_pending == 8
+    assert spreadsheet.worksheet("Income").reads == 1
+
+    runs = 1
+    while reconciler.run().blocks_pending:
+        runs += 1
+    assert runs == 3
+
+
+def test_state_survives_restart(tmp_path):
+    spreadsheet, rows, reconciler = _make(tmp_path)
+    reconciler.run()
+
+    restarted = Reconciler(
+        spreadsheet,
+        AppendLedger(str(tmp_path / "ledger.jsonl")),
+        ["Income"],
+        str(tmp_path / "state.json"),
+        block_size=5,
+    )
+    assert restarted.run().blocks_checked == 0
+
+
+def test_compare_block_carries_offset():
+    expected = {row: hash_row([f"value {row}"]) for row in range(1, 21)}
+    # Rows 2 and 3 deleted: rows 4..8 moved up to 2..6
+    actual = [expected[1]] + [expected[row] for row in range(4, 8)]
+
+    discrepancies, offset = compare_block("Income", expected, actual, start=1, end=5, offset=0)
+
+    assert discrepancies == [
+        Discrepancy("Income", 2, "deleted"),
+        Discrepancy("Income", 3, "deleted"),
+    ]
+    assert offset == -2
+
+
+def test_ledger_numbers_appends_in_order_regardless_of_sheet_row(tmp_path):
+    ledger = AppendLedger(str(tmp_path / "ledger.jsonl"))
+
+    assert ledger.record_append("Income", 5, ["a"]) == 5
+    # A row above was deleted by hand, so the next append lands on the same sheet row
+    assert ledger.record_append("Income", 5, ["b"]) == 6
+
+    ledger.record_update("Income", 5, ["a", "receipt"])
+    reloaded = AppendLedger(str(tmp_path / "ledger.jsonl"))
+    assert reloaded.snapshot("Income") == {5: hash_row(["a", "receipt"]), 6: hash_row(["b"])}
+
+
+def test_bot_append_after_deleted_row_is_not_reported(tmp_path):
+    spreadsheet, rows, reconciler = _make(tmp_path)
+    reconciler.run()
+
+    del rows[2]  # sheet row 3
+    spreadsheet.revision += 1
+    assert reconciler.run().discrepancies == [Discrepancy("Income", 3, "deleted")]
+
+    _bot_append(spreadsheet, rows, reconciler, ["value 31", "x"])  # lands on sheet row 30
+    assert reconciler.run().discrepancies == [Discrepancy("Income", 3, "deleted")]
+    assert reconciler.run().discrepancies == [Discrepancy("Income", 3, "deleted")]
+
+
+def test_bot_append_after_inserted_row_is_not_reported(tmp_path):
+    spreadsheet, rows, reconciler = _make(tmp_path)
+    reconciler.run()
+
+    rows.insert(3, ["added by hand"])  # sheet row 4
+    spreadsheet.revision += 1
+    assert reconciler.run().discrepancies == [Discrepancy("Income", 4, "inserted")]
+
+    _bot_append(spreadsheet, rows, reconciler, ["value 31", "x"])  # lands on sheet row 32
+    assert reconciler.run().discrepancies == [Discrepancy("Income", 4, "inserted")]
+    assert reconciler.run().discrepancies == [Discrepancy("Income", 4, "inserted")]
+
+
+def test_bot_writes_do_not_make_unchanged_blocks_stale(tmp_path):
+    spreadsheet, rows, reconciler = _make(tmp_path, rows=100, block_size=10)
+    reconciler.run()
+
+    _bot_append(spreadsheet, rows, reconciler, ["value 101", "x"])
+    _bot_append(spreadsheet, rows, reconciler, ["value 102", "x"])
+    report = reconciler.run()
+    # Only the block with the new rows and the extra block after it
+    assert report.blocks_checked == 2
+    assert report.discrepancies == []
+
+    # A hand edit between bot writes breaks the chain of bot revisions
+    rows[11] = ["edited", "x"]
+    spreadsheet.revision += 1
+    _bot_append(spreadsheet, rows, reconciler, ["value 103", "x"])
+    report = reconciler.run()
+    assert report.blocks_checked == 12
+    assert report.discrepancies == [Discrepancy("Income", 12, "modified")]